@@ -31,6 +31,7 @@ setup(
     packages=find_namespace_packages(where='src'),
     install_requires=[
         "kasperl",
+        "numpy>=1.23",
         "plotext",
         "matplotlib",
         "sixel",
@@ -1,6 +1,69 @@
+import math
+import types
+from typing import Any, Tuple
+
+import numpy
+
 PLOT_LINE = "line"
 PLOT_SCATTER = "scatter"
 PLOT_TYPES = [
     PLOT_LINE,
     PLOT_SCATTER,
 ]
+
+BUFFER_SIZE = 1024 * 1024
+
+DEFAULT_MAX_POINTS = 10000
+
+RASTERIZE_THRESHOLD = 10000
+
+
+def first_item(data) -> Tuple[Any, int]:
+    """
+    Returns the first data item and the total number of items. Unlike make_list,
+    generators do not get turned into lists, they just get counted.
+
+    :param data: the data to inspect, either a list, a generator or a single item
+    :return: the tuple of first item (None if no data) and number of items
+    :rtype: tuple
+    """
+    if isinstance(data, types.GeneratorType):
+        first = None
+        count = 0
+        for item in data:
+            if count == 0:
+                first = item
+            count += 1
+        return first, count
+    if isinstance(data, list):
+        return (data[0] if (len(data) > 0) else None), len(data)
+    return data, 1
+
+
+def downsample(x, y, max_points: int, plot_type: str) -> Tuple[Any, Any]:
+    """
+    Reduces the data to at most max_points points, to avoid rasterizing lots of overlapping points.
+    Line plots use every n-th point, scatter plots a (seeded) random sample that retains the order.
+    For sequences (x is None), the original positions get returned as x values when downsampling.
+
+    :param x: the x values, None for sequences
+    :param y: the y values
+    :param max_points: the maximum number of points, no downsampling if None or <= 0
+    :type max_points: int
+    :param plot_type: the type of plot the data is for
+    :type plot_type: str
+    :return: the tuple of (potentially) downsampled x and y values
+    :rtype: tuple
+    """
+    if (max_points is None) or (max_points <= 0) or (len(y) <= max_points):
+        return x, y
+    if plot_type == PLOT_SCATTER:
+        rng = numpy.random.default_rng(1)
+        indices = numpy.sort(rng.choice(len(y), size=max_points, replace=False))
+    else:
+        indices = numpy.arange(0, len(y), math.ceil(len(y) / max_points))
+    if x is None:
+        x = indices
+    else:
+        x = numpy.asarray(x)[indices]
+    return x, numpy.asarray(y)[indices]
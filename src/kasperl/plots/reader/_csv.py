@@ -1,13 +1,31 @@
 import argparse
 import csv
 import os.path
+from operator import itemgetter
 from typing import List, Iterable, Union
 
+import numpy
 from seppl.io import locate_files
 from wai.logging import LOGGING_WARNING
 
 from seppl.placeholders import PlaceholderSupporter, placeholder_list
 from kasperl.api import Reader, Plot, XYPlot, SequencePlot
+from kasperl.plots.core import BUFFER_SIZE
+
+
+def _to_numeric(values: List[str]) -> Union[numpy.ndarray, List[str]]:
+    """
+    Turns the string values into a float array, if possible.
+
+    :param values: the values to convert
+    :type values: list
+    :return: the float array, the original values if not numeric
+    :rtype: numpy.ndarray or list
+    """
+    try:
+        return numpy.asarray(values, dtype=numpy.float64)
+    except ValueError:
+        return values
 
 
 class CsvPlotReader(Reader, PlaceholderSupporter):
@@ -54,6 +72,7 @@ class CsvPlotReader(Reader, PlaceholderSupporter):
         self._current_input = None
         self._x_col = None
         self._y_col = None
+        self._usecols = None
 
     def name(self) -> str:
         """
@@ -132,6 +151,7 @@ class CsvPlotReader(Reader, PlaceholderSupporter):
         self._x_col = None
         if self.x_data is not None:
             self._x_col = int(self.x_data) - 1
+        self._usecols = [self._y_col] if (self._x_col is None) else [self._x_col, self._y_col]
         if self.separator is None:
             self.separator = ","
 
@@ -148,24 +168,41 @@ class CsvPlotReader(Reader, PlaceholderSupporter):
         self.session.current_input = self._current_input
         self.logger().info("Reading from: " + str(self.session.current_input))
 
-        x = None if (self._x_col is None) else []
-        y = []
+        x = None
+        y = None
         x_label = None
         y_label = None
-        first = True
-        with open(self.session.current_input, "r", newline='') as fp:
+        with open(self.session.current_input, "r", newline='', buffering=BUFFER_SIZE) as fp:
             reader = csv.reader(fp, delimiter=self.separator)
-            for row in reader:
-                # header
-                if first:
-                    first = False
-                    if self._x_col is not None:
-                        x_label = row[self._x_col]
-                    y_label = row[self._y_col]
-                # data
+            # header
+            header = next(reader, None)
+            if header is not None:
+                if self._x_col is not None:
+                    x_label = header[self._x_col]
+                y_label = header[self._y_col]
+            # data: parse numeric columns straight into float arrays, fall back on per-column conversion
+            try:
+                values = numpy.loadtxt(fp, delimiter=self.separator, quotechar='"', usecols=self._usecols,
+                                       comments=None, dtype=numpy.float64, ndmin=2)
+                # contiguous copies rather than strided views of the row-major values
                 if self._x_col is not None:
-                    x.append(row[self._x_col])
-                y.append(row[self._y_col])
+                    x = numpy.ascontiguousarray(values[:, 0])
+                y = numpy.ascontiguousarray(values[:, -1])
+            except ValueError:
+                self.logger().info("Non-numeric data, converting columns individually")
+                fp.seek(0)
+                reader = csv.reader(fp, delimiter=self.separator)
+                next(reader, None)
+                if self._x_col is None:
+                    y = list(map(itemgetter(self._y_col), reader))
+                else:
+                    pairs = list(map(itemgetter(self._x_col, self._y_col), reader))
+                    x = []
+                    y = []
+                    if len(pairs) > 0:
+                        x, y = map(list, zip(*pairs))
+                    x = _to_numeric(x)
+                y = _to_numeric(y)
 
         title = self.title if (self.title is not None) else os.path.basename(self.session.current_input)
         meta = {"source": self.session.current_input}
@@ -2,12 +2,28 @@ import argparse
 import csv
 from typing import List, Iterable
 
+import numpy
 from wai.logging import LOGGING_WARNING
 
-from kasperl.api import make_list, BatchWriter, Plot, XYPlot, SequencePlot
+from kasperl.api import BatchWriter, Plot, XYPlot, SequencePlot
+from kasperl.plots.core import BUFFER_SIZE, first_item
 from seppl.placeholders import placeholder_list, InputBasedPlaceholderSupporter
 
 
+def _to_python(values):
+    """
+    Turns numpy arrays of integers, booleans or doubles into lists of Python objects, which the csv
+    module can format faster than numpy scalars (with identical output).
+
+    :param values: the values to convert
+    :return: the list or the original values
+    :rtype: list
+    """
+    if isinstance(values, numpy.ndarray) and ((values.dtype.kind in "biu") or (values.dtype == numpy.float64)):
+        return values.tolist()
+    return values
+
+
 class CsvPlotWriter(BatchWriter, InputBasedPlaceholderSupporter):
 
     def __init__(self, output: str = None, separator: str = None,
@@ -85,26 +101,23 @@ class CsvPlotWriter(BatchWriter, InputBasedPlaceholderSupporter):
         :param data: the data to write
         :type data: Iterable
         """
-        data = make_list(data)
-        if len(data) == 0:
+        data, num_items = first_item(data)
+        if num_items == 0:
             self.logger().warning("No data to save!")
             return
-        if len(data) > 1:
-            self.logger().warning("Can only save the first of %d data items!" % len(data))
-        data = data[0]
+        if num_items > 1:
+            self.logger().warning("Can only save the first of %d data items!" % num_items)
         path = self.session.expand_placeholders(self.output_file)
-        with open(path, "w", newline='') as fp:
+        with open(path, "w", newline='', buffering=BUFFER_SIZE) as fp:
             writer = csv.writer(fp, delimiter=self.separator)
             if isinstance(data, XYPlot):
                 x_label = "x" if (data.x_label is None) else data.x_label
                 y_label = "y" if (data.y_label is None) else data.y_label
                 writer.writerow([x_label, y_label])
-                for x, y in zip(data.x_data, data.y_data):
-                    writer.writerow([x, y])
+                writer.writerows(zip(_to_python(data.x_data), _to_python(data.y_data)))
             elif isinstance(data, SequencePlot):
                 label = "value" if (data.label is None) else data.label
                 writer.writerow([label])
-                for value in data.data:
-                    writer.writerow([value])
+                writer.writerows(zip(_to_python(data.data)))
             else:
                 raise Exception("Unhandled plot class: %s" % str(type(data)))
@@ -1,17 +1,20 @@
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from typing import List, Iterable
 
-import matplotlib.pyplot as plt
 from wai.logging import LOGGING_WARNING
 
-from kasperl.api import make_list, BatchWriter, Plot, XYPlot, SequencePlot
-from kasperl.plots.core import PLOT_TYPES, PLOT_LINE, PLOT_SCATTER
+from kasperl.api import make_list, BatchWriter, Plot
+from kasperl.plots.core import PLOT_TYPES, PLOT_LINE, DEFAULT_MAX_POINTS, first_item
 from seppl.placeholders import placeholder_list, InputBasedPlaceholderSupporter
+from ._render import draw_plot, render_plot, image_format, expand_output
 
 
 class GraphicalPlot(BatchWriter, InputBasedPlaceholderSupporter):
 
-    def __init__(self, output: str = None, plot_type: str = None, block: bool = None,
+    def __init__(self, output: str = None, plot_type: str = None, max_points: int = DEFAULT_MAX_POINTS, block: bool = None,
+                 jobs: int = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the writer.
@@ -20,8 +23,12 @@ class GraphicalPlot(BatchWriter, InputBasedPlaceholderSupporter):
         :type output: str
         :param plot_type: the type of plot to generate
         :type plot_type: str
+        :param max_points: the maximum number of points to plot, downsamples the data if exceeded, no downsampling if None or <= 0
+        :type max_points: int
         :param block: whether to block the execution till the user closes the dialog
         :type block: bool
+        :param jobs: the number of processes to use for rendering all plots of a batch in parallel
+        :type jobs: int
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -30,7 +37,12 @@ class GraphicalPlot(BatchWriter, InputBasedPlaceholderSupporter):
         super().__init__(logger_name=logger_name, logging_level=logging_level)
         self.output_file = output
         self.plot_type = plot_type
+        self.max_points = max_points
         self.block = block
+        self.jobs = jobs
+        self._fig = None
+        self._ax = None
+        self._executor = None
 
     def name(self) -> str:
         """
@@ -60,7 +72,9 @@ class GraphicalPlot(BatchWriter, InputBasedPlaceholderSupporter):
         parser = super()._create_argparser()
         parser.add_argument("-o", "--output", type=str, help="The file to save the plot in. " + placeholder_list(obj=self), required=False, default=None)
         parser.add_argument("-t", "--plot_type", choices=PLOT_TYPES, help="The type of plot to generate.", required=False, default=PLOT_LINE)
+        parser.add_argument("-m", "--max_points", type=int, help="The maximum number of points to plot; the data gets downsampled when exceeding this number; use <= 0 to plot all points.", required=False, default=DEFAULT_MAX_POINTS)
         parser.add_argument("-b", "--block", action="store_true", help="Whether to block the execution till the user closes the dialog.")
+        parser.add_argument("-j", "--jobs", type=int, help="The number of processes to use for rendering the plots in parallel; with more than one job, all plots of a batch get saved rather than just the first; requires an output file and no blocking.", required=False, default=1)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -73,7 +87,9 @@ class GraphicalPlot(BatchWriter, InputBasedPlaceholderSupporter):
         super()._apply_args(ns)
         self.output_file = ns.output
         self.plot_type = ns.plot_type
+        self.max_points = ns.max_points
         self.block = ns.block
+        self.jobs = ns.jobs
 
     def accepts(self) -> List:
         """
@@ -84,6 +100,33 @@ class GraphicalPlot(BatchWriter, InputBasedPlaceholderSupporter):
         """
         return [Plot]
 
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if (self.jobs is not None) and (self.jobs > 1):
+            if self.block or (self.output_file is None):
+                self.logger().warning("Parallel rendering requires an output file and no blocking, ignoring jobs!")
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.jobs)
+        # figure only gets used when not rendering in parallel (or when falling back on a single plot)
+        if self._executor is None:
+            self._new_figure()
+
+    def _new_figure(self):
+        """
+        Creates a new figure to draw on. Only uses pyplot when blocking, i.e., when displaying the plot,
+        otherwise a plain figure is used that does not involve any GUI backend.
+        """
+        if self.block:
+            import matplotlib.pyplot as plt
+            self._fig, self._ax = plt.subplots()
+        else:
+            from matplotlib.figure import Figure
+            self._fig = Figure()
+            self._ax = self._fig.add_subplot()
+
     def write_batch(self, data: Iterable):
         """
         Saves the data in one go.
@@ -91,45 +134,71 @@ class GraphicalPlot(BatchWriter, InputBasedPlaceholderSupporter):
         :param data: the data to write
         :type data: Iterable
         """
-        data = make_list(data)
-        if len(data) == 0:
+        if self._executor is not None:
+            data = make_list(data)
+            if self._write_parallel(data):
+                return
+
+        data, num_items = first_item(data)
+        if num_items == 0:
             self.logger().warning("No data to plot!")
             return
-        if len(data) > 1:
-            self.logger().warning("Can only plot the first of %d data items!" % len(data))
-        data = data[0]
+        if num_items > 1:
+            self.logger().warning("Can only plot the first of %d data items!" % num_items)
 
         path = None
         if self.output_file is not None:
-            path = self.session.expand_placeholders(self.output_file)
-
-        plt.clf()
+            path = expand_output(self.output_file, data, self.session.current_input)
 
-        if isinstance(data, XYPlot):
-            if self.plot_type == PLOT_LINE:
-                plt.plot(data.x_data, data.y_data)
-            elif self.plot_type == PLOT_SCATTER:
-                plt.scatter(data.x_data, data.y_data)
-            else:
-                raise Exception("Unhandled plot type: %s" % self.plot_type)
-            x_label = "x" if (data.x_label is None) else data.x_label
-            y_label = "y" if (data.y_label is None) else data.y_label
-            plt.xlabel(x_label)
-            plt.ylabel(y_label)
-        elif isinstance(data, SequencePlot):
-            if self.plot_type == PLOT_LINE:
-                plt.plot(data.data)
-            elif self.plot_type == PLOT_SCATTER:
-                plt.scatter(data.data)
-            else:
-                raise Exception("Unhandled plot type: %s" % self.plot_type)
-            label = "value" if (data.label is None) else data.label
-            plt.ylabel(label)
-        else:
-            raise Exception("Unhandled plot class: %s" % str(type(data)))
-
-        plt.title("Plot" if (data.title is None) else data.title)
+        # re-use figure, unless the user closed the window in the meantime
+        if self.block:
+            import matplotlib.pyplot as plt
+            if (self._fig is None) or (not plt.fignum_exists(self._fig.number)):
+                self._new_figure()
+        elif self._fig is None:
+            self._new_figure()
+        self._ax.cla()
+
+        draw_plot(self._ax, data, self.plot_type, self.max_points)
         if path is not None:
-            plt.savefig(path)
+            self._fig.savefig(path)
         if self.block:
             plt.show(block=self.block)
+
+    def _write_parallel(self, data: List[Plot]) -> bool:
+        """
+        Renders all the plots using the process pool and saves them.
+
+        :param data: the plots to save
+        :type data: list
+        :return: False if the plots did not get saved as the output files are not unique
+        :rtype: bool
+        """
+        if len(data) == 0:
+            self.logger().warning("No data to plot!")
+            return True
+        paths = [expand_output(self.output_file, item, self.session.current_input) for item in data]
+        if len(set(paths)) < len(paths):
+            self.logger().warning("Output files are not unique, falling back on plotting a single item!")
+            return False
+        formats = [[image_format(path)] for path in paths]
+        results = self._executor.map(render_plot, data, repeat(self.plot_type), repeat(self.max_points), formats)
+        for path, images in zip(paths, results):
+            with open(path, "wb") as fp:
+                fp.write(images[0])
+        return True
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        super().finalize()
+        if self._fig is not None:
+            if self.block:
+                import matplotlib.pyplot as plt
+                plt.close(self._fig)
+            self._fig = None
+            self._ax = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,117 @@
+import io
+import os
+from typing import List
+
+from seppl.placeholders import expand_placeholders
+
+from kasperl.api import Plot, XYPlot, SequencePlot
+from kasperl.plots.core import PLOT_LINE, PLOT_SCATTER, RASTERIZE_THRESHOLD, downsample
+
+
+def draw_plot(ax, data: Plot, plot_type: str, max_points: int):
+    """
+    Draws the plot data on the matplotlib axes.
+
+    :param ax: the axes to draw on
+    :param data: the plot data to draw
+    :type data: Plot
+    :param plot_type: the type of plot to generate
+    :type plot_type: str
+    :param max_points: the maximum number of points to plot, no downsampling if None or <= 0
+    :type max_points: int
+    """
+    if isinstance(data, XYPlot):
+        x, y = downsample(data.x_data, data.y_data, max_points, plot_type)
+        rasterized = len(y) > RASTERIZE_THRESHOLD
+        if plot_type == PLOT_LINE:
+            ax.plot(x, y, rasterized=rasterized)
+        elif plot_type == PLOT_SCATTER:
+            ax.scatter(x, y, rasterized=rasterized)
+        else:
+            raise Exception("Unhandled plot type: %s" % plot_type)
+        x_label = "x" if (data.x_label is None) else data.x_label
+        y_label = "y" if (data.y_label is None) else data.y_label
+        ax.set_xlabel(x_label)
+        ax.set_ylabel(y_label)
+    elif isinstance(data, SequencePlot):
+        x, y = downsample(None, data.data, max_points, plot_type)
+        if x is None:
+            x = range(len(y))
+        rasterized = len(y) > RASTERIZE_THRESHOLD
+        if plot_type == PLOT_LINE:
+            ax.plot(x, y, rasterized=rasterized)
+        elif plot_type == PLOT_SCATTER:
+            ax.scatter(x, y, rasterized=rasterized)
+        else:
+            raise Exception("Unhandled plot type: %s" % plot_type)
+        label = "value" if (data.label is None) else data.label
+        ax.set_ylabel(label)
+    else:
+        raise Exception("Unhandled plot class: %s" % str(type(data)))
+
+    ax.set_title("Plot" if (data.title is None) else data.title)
+
+
+def render_plot(data: Plot, plot_type: str, max_points: int, formats: List[str]) -> List[bytes]:
+    """
+    Renders the plot in a new figure and returns the generated image(s). Module-level function,
+    so it can be used in worker processes. Does not use pyplot, i.e., no GUI backend gets involved.
+
+    :param data: the plot data to render
+    :type data: Plot
+    :param plot_type: the type of plot to generate
+    :type plot_type: str
+    :param max_points: the maximum number of points to plot, no downsampling if None or <= 0
+    :type max_points: int
+    :param formats: the image formats to generate, e.g., png or pdf
+    :type formats: list
+    :return: the generated images, one per format
+    :rtype: list
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    draw_plot(fig.add_subplot(), data, plot_type, max_points)
+    result = []
+    for fmt in formats:
+        buf = io.BytesIO()
+        fig.savefig(buf, format=fmt)
+        result.append(buf.getvalue())
+    return result
+
+
+def image_format(path: str) -> str:
+    """
+    Determines the image format from the file's extension.
+
+    :param path: the file to get the format for
+    :type path: str
+    :return: the format, png if no extension
+    :rtype: str
+    """
+    ext = os.path.splitext(path)[1]
+    if len(ext) == 0:
+        return "png"
+    return ext[1:].lower()
+
+
+def expand_output(template: str, data: Plot, current_input: str) -> str:
+    """
+    Expands the placeholders in the output template, using the source file stored in
+    the meta-data of the plot as current input (if available).
+
+    :param template: the output template to expand
+    :type template: str
+    :param data: the plot to expand the output for
+    :type data: Plot
+    :param current_input: the current input to fall back on if the plot has no source
+    :type current_input: str
+    :return: the expanded output
+    :rtype: str
+    """
+    source = None
+    if isinstance(data.metadata, dict):
+        source = data.metadata.get("source")
+    if source is None:
+        source = current_input
+    return expand_placeholders(template, current_input=source)
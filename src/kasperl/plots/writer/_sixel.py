@@ -1,22 +1,24 @@
 import argparse
+import io
 import os
 import sys
 import tempfile
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from typing import List, Iterable
 
-import matplotlib.pyplot as plt
 from wai.logging import LOGGING_WARNING
 
-from kasperl.api import make_list, BatchWriter, Plot, XYPlot, SequencePlot
-from kasperl.plots.core import PLOT_TYPES, PLOT_LINE, PLOT_SCATTER
+from kasperl.api import make_list, BatchWriter, Plot
+from kasperl.plots.core import PLOT_TYPES, PLOT_LINE, DEFAULT_MAX_POINTS, first_item
 from seppl.placeholders import placeholder_list, InputBasedPlaceholderSupporter
-from sixel import converter
+from ._render import draw_plot, render_plot, image_format, expand_output
 
 
 class SixelPlot(BatchWriter, InputBasedPlaceholderSupporter):
 
-    def __init__(self, output: str = None, plot_type: str = None,
+    def __init__(self, output: str = None, plot_type: str = None, max_points: int = DEFAULT_MAX_POINTS, jobs: int = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the writer.
@@ -25,6 +27,10 @@ class SixelPlot(BatchWriter, InputBasedPlaceholderSupporter):
         :type output: str
         :param plot_type: the type of plot to generate
         :type plot_type: str
+        :param max_points: the maximum number of points to plot, downsamples the data if exceeded, no downsampling if None or <= 0
+        :type max_points: int
+        :param jobs: the number of processes to use for rendering all plots of a batch in parallel
+        :type jobs: int
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -33,7 +39,12 @@ class SixelPlot(BatchWriter, InputBasedPlaceholderSupporter):
         super().__init__(logger_name=logger_name, logging_level=logging_level)
         self.output_file = output
         self.plot_type = plot_type
+        self.max_points = max_points
+        self.jobs = jobs
         self._tmp_file = None
+        self._fig = None
+        self._ax = None
+        self._executor = None
 
     def name(self) -> str:
         """
@@ -65,6 +76,8 @@ class SixelPlot(BatchWriter, InputBasedPlaceholderSupporter):
         parser = super()._create_argparser()
         parser.add_argument("-o", "--output", type=str, help="The file to save the plot in. " + placeholder_list(obj=self), required=False, default=None)
         parser.add_argument("-t", "--plot_type", choices=PLOT_TYPES, help="The type of plot to generate.", required=False, default=PLOT_LINE)
+        parser.add_argument("-m", "--max_points", type=int, help="The maximum number of points to plot; the data gets downsampled when exceeding this number; use <= 0 to plot all points.", required=False, default=DEFAULT_MAX_POINTS)
+        parser.add_argument("-j", "--jobs", type=int, help="The number of processes to use for rendering the plots in parallel; with more than one job, all plots of a batch get displayed rather than just the first.", required=False, default=1)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -77,6 +90,8 @@ class SixelPlot(BatchWriter, InputBasedPlaceholderSupporter):
         super()._apply_args(ns)
         self.output_file = ns.output
         self.plot_type = ns.plot_type
+        self.max_points = ns.max_points
+        self.jobs = ns.jobs
 
     def accepts(self) -> List:
         """
@@ -91,8 +106,21 @@ class SixelPlot(BatchWriter, InputBasedPlaceholderSupporter):
         """
         Initializes the processing, e.g., for opening files or databases.
         """
+        from matplotlib.figure import Figure
+
         super().initialize()
-        self._tmp_file = os.path.join(tempfile.gettempdir(), str(uuid.uuid1()) + ".png")
+        # prefer RAM-backed tmpfs for the temp file, if available
+        if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+            tmp_dir = "/dev/shm"
+        else:
+            tmp_dir = tempfile.gettempdir()
+        self._tmp_file = os.path.join(tmp_dir, uuid.uuid4().hex + ".png")
+        if (self.jobs is not None) and (self.jobs > 1):
+            self._executor = ProcessPoolExecutor(max_workers=self.jobs)
+        # figure only gets used when not rendering in parallel (or when falling back on a single plot)
+        if self._executor is None:
+            self._fig = Figure()
+            self._ax = self._fig.add_subplot()
 
     def write_batch(self, data: Iterable):
         """
@@ -101,57 +129,104 @@ class SixelPlot(BatchWriter, InputBasedPlaceholderSupporter):
         :param data: the data to write
         :type data: Iterable
         """
-        data = make_list(data)
-        if len(data) == 0:
+        from matplotlib.figure import Figure
+
+        if self._executor is not None:
+            data = make_list(data)
+            if self._write_parallel(data):
+                return
+
+        data, num_items = first_item(data)
+        if num_items == 0:
             self.logger().warning("No data to plot!")
             return
-        if len(data) > 1:
-            self.logger().warning("Can only plot the first of %d data items!" % len(data))
-        data = data[0]
+        if num_items > 1:
+            self.logger().warning("Can only plot the first of %d data items!" % num_items)
 
         path = None
         if self.output_file is not None:
-            path = self.session.expand_placeholders(self.output_file)
+            path = expand_output(self.output_file, data, self.session.current_input)
 
-        plt.clf()
+        # re-use figure
+        if self._fig is None:
+            self._fig = Figure()
+            self._ax = self._fig.add_subplot()
+        self._ax.cla()
 
-        if isinstance(data, XYPlot):
-            if self.plot_type == PLOT_LINE:
-                plt.plot(data.x_data, data.y_data)
-            elif self.plot_type == PLOT_SCATTER:
-                plt.scatter(data.x_data, data.y_data)
-            else:
-                raise Exception("Unhandled plot type: %s" % self.plot_type)
-            x_label = "x" if (data.x_label is None) else data.x_label
-            y_label = "y" if (data.y_label is None) else data.y_label
-            plt.xlabel(x_label)
-            plt.ylabel(y_label)
-        elif isinstance(data, SequencePlot):
-            if self.plot_type == PLOT_LINE:
-                plt.plot(data.data)
-            elif self.plot_type == PLOT_SCATTER:
-                plt.scatter(data.data)
-            else:
-                raise Exception("Unhandled plot type: %s" % self.plot_type)
-            label = "value" if (data.label is None) else data.label
-            plt.ylabel(label)
+        draw_plot(self._ax, data, self.plot_type, self.max_points)
+
+        # render only once if the output file is a PNG already, otherwise use temp file for display
+        if (path is not None) and path.lower().endswith(".png"):
+            img_file = path
         else:
-            raise Exception("Unhandled plot class: %s" % str(type(data)))
+            img_file = self._tmp_file
+            if path is not None:
+                self._fig.savefig(path)
+        self._fig.savefig(img_file)
+        self._display(img_file)
+
+    def _write_parallel(self, data: List[Plot]) -> bool:
+        """
+        Renders all the plots using the process pool, displays and (optionally) saves them.
 
-        plt.title("Plot" if (data.title is None) else data.title)
-        if path is not None:
-            plt.savefig(path)
+        :param data: the plots to display
+        :type data: list
+        :return: False if the plots did not get displayed as the output files are not unique
+        :rtype: bool
+        """
+        if len(data) == 0:
+            self.logger().warning("No data to plot!")
+            return True
+        paths = [None] * len(data)
+        if self.output_file is not None:
+            paths = [expand_output(self.output_file, item, self.session.current_input) for item in data]
+            if len(set(paths)) < len(paths):
+                self.logger().warning("Output files are not unique, falling back on plotting a single item!")
+                return False
+        # PNG for display, plus the format of the output file if different
+        formats = []
+        for path in paths:
+            if (path is None) or (image_format(path) == "png"):
+                formats.append(["png"])
+            else:
+                formats.append(["png", image_format(path)])
+        results = self._executor.map(render_plot, data, repeat(self.plot_type), repeat(self.max_points), formats)
+        for path, images in zip(paths, results):
+            if path is not None:
+                with open(path, "wb") as fp:
+                    fp.write(images[-1])
+            with open(self._tmp_file, "wb") as fp:
+                fp.write(images[0])
+            self._display(self._tmp_file)
+        return True
+
+    def _display(self, img_file: str):
+        """
+        Displays the PNG image in the terminal.
+
+        :param img_file: the image to display
+        :type img_file: str
+        """
+        from sixel import converter
 
-        # create temp file and display it
-        plt.savefig(self._tmp_file)
-        c = converter.SixelConverter(self._tmp_file)
-        c.write(sys.stdout)
+        c = converter.SixelConverter(img_file)
+        # the converter emits lots of small strings, collect them before writing to stdout
+        buf = io.StringIO()
+        c.write(buf)
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
 
     def finalize(self):
         """
         Finishes the processing, e.g., for closing files or databases.
         """
         super().finalize()
+        if self._fig is not None:
+            self._fig = None
+            self._ax = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
         if (self._tmp_file is not None) and (os.path.exists(self._tmp_file)):
             try:
                 self.logger().info("Cleaning up: %s" % self._tmp_file)
@@ -1,17 +1,16 @@
 import argparse
 from typing import List, Iterable
 
-import plotext as plt
 from wai.logging import LOGGING_WARNING
 
-from kasperl.api import make_list, BatchWriter, Plot, XYPlot, SequencePlot
-from kasperl.plots.core import PLOT_TYPES, PLOT_LINE, PLOT_SCATTER
+from kasperl.api import BatchWriter, Plot, XYPlot, SequencePlot
+from kasperl.plots.core import PLOT_TYPES, PLOT_LINE, PLOT_SCATTER, DEFAULT_MAX_POINTS, first_item, downsample
 from seppl.placeholders import placeholder_list, InputBasedPlaceholderSupporter
 
 
 class TerminalPlot(BatchWriter, InputBasedPlaceholderSupporter):
 
-    def __init__(self, output: str = None, plot_type: str = None,
+    def __init__(self, output: str = None, plot_type: str = None, max_points: int = DEFAULT_MAX_POINTS,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the writer.
@@ -20,6 +19,8 @@ class TerminalPlot(BatchWriter, InputBasedPlaceholderSupporter):
         :type output: str
         :param plot_type: the type of plot to generate
         :type plot_type: str
+        :param max_points: the maximum number of points to plot, downsamples the data if exceeded, no downsampling if None or <= 0
+        :type max_points: int
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -28,6 +29,7 @@ class TerminalPlot(BatchWriter, InputBasedPlaceholderSupporter):
         super().__init__(logger_name=logger_name, logging_level=logging_level)
         self.output_file = output
         self.plot_type = plot_type
+        self.max_points = max_points
 
     def name(self) -> str:
         """
@@ -57,6 +59,7 @@ class TerminalPlot(BatchWriter, InputBasedPlaceholderSupporter):
         parser = super()._create_argparser()
         parser.add_argument("-o", "--output", type=str, help="The file to save the plot in. " + placeholder_list(obj=self), required=False, default=None)
         parser.add_argument("-t", "--plot_type", choices=PLOT_TYPES, help="The type of plot to generate.", required=False, default=PLOT_LINE)
+        parser.add_argument("-m", "--max_points", type=int, help="The maximum number of points to plot; the data gets downsampled when exceeding this number; use <= 0 to plot all points.", required=False, default=DEFAULT_MAX_POINTS)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -69,6 +72,7 @@ class TerminalPlot(BatchWriter, InputBasedPlaceholderSupporter):
         super()._apply_args(ns)
         self.output_file = ns.output
         self.plot_type = ns.plot_type
+        self.max_points = ns.max_points
 
     def accepts(self) -> List:
         """
@@ -86,13 +90,14 @@ class TerminalPlot(BatchWriter, InputBasedPlaceholderSupporter):
         :param data: the data to write
         :type data: Iterable
         """
-        data = make_list(data)
-        if len(data) == 0:
+        import plotext as plt
+
+        data, num_items = first_item(data)
+        if num_items == 0:
             self.logger().warning("No data to plot!")
             return
-        if len(data) > 1:
-            self.logger().warning("Can only plot the first of %d data items!" % len(data))
-        data = data[0]
+        if num_items > 1:
+            self.logger().warning("Can only plot the first of %d data items!" % num_items)
 
         path = None
         if self.output_file is not None:
@@ -101,10 +106,11 @@ class TerminalPlot(BatchWriter, InputBasedPlaceholderSupporter):
         plt.clear_figure()
 
         if isinstance(data, XYPlot):
+            x, y = downsample(data.x_data, data.y_data, self.max_points, self.plot_type)
             if self.plot_type == PLOT_LINE:
-                plt.plot(data.x_data, data.y_data)
+                plt.plot(x, y)
             elif self.plot_type == PLOT_SCATTER:
-                plt.scatter(data.x_data, data.y_data)
+                plt.scatter(x, y)
             else:
                 raise Exception("Unhandled plot type: %s" % self.plot_type)
             x_label = "x" if (data.x_label is None) else data.x_label
@@ -112,10 +118,16 @@ class TerminalPlot(BatchWriter, InputBasedPlaceholderSupporter):
             plt.xlabel(label=x_label)
             plt.ylabel(label=y_label)
         elif isinstance(data, SequencePlot):
+            x, y = downsample(None, data.data, self.max_points, self.plot_type)
+            if x is None:
+                x = range(1, len(y) + 1)
+            else:
+                # plotext uses 1-based positions for sequences
+                x = x + 1
             if self.plot_type == PLOT_LINE:
-                plt.plot(data.data)
+                plt.plot(x, y)
             elif self.plot_type == PLOT_SCATTER:
-                plt.scatter(data.data)
+                plt.scatter(x, y)
             else:
                 raise Exception("Unhandled plot type: %s" % self.plot_type)
             label = "value" if (data.label is None) else data.label